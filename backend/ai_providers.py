@@ -1,40 +1,57 @@
 """Ollama AI provider client — local LLM inference."""
 
 import asyncio
-import json
+import functools
+import io
 import re
+import time
 import httpx
+import ijson
+import orjson
+from http_client import get_http_client
 import logging
 
 logger = logging.getLogger(__name__)
 
 OLLAMA_BASE_URL = "http://localhost:11434"
 DEFAULT_MODEL = "deepseek-r1:1.5b"
+MODELS_CACHE_TTL = 10.0  # seconds to reuse the /api/tags model list
+PARTIAL_PARSE_MIN_LENGTH = 8192  # replies this long use the incremental parse instead of trim attempts
 
 SYSTEM_MSG = "You are an expert course creator. Return ONLY valid JSON. No preamble. No markdown. No conversational text. Do not explain your response."
 
-BACKSLASH = chr(92)  # The backslash character, avoiding escaping issues
+# Precompiled patterns for response cleanup and JSON repair
+_RE_ESCAPE = re.compile(r'\\.', re.DOTALL)
+_RE_QUOTE_OR_COMMA = re.compile(r'[",]')
+_RE_TRAILING_KEY = re.compile(r',\s*"[^"]*"\s*:\s*$')
+_RE_TRAILING_COMMA = re.compile(r',\s*$')
 
+# Last successful list_models() result and when it was fetched
+_models_cache = {"t": 0.0, "v": None}
 
 async def check_ollama_health() -> dict:
     """Check if Ollama is running and accessible."""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-            response.raise_for_status()
-            return {"status": "connected", "url": OLLAMA_BASE_URL}
+        client = get_http_client()
+        response = await client.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5.0)
+        response.raise_for_status()
+        return {"status": "connected", "url": OLLAMA_BASE_URL}
     except Exception as e:
         logger.error(f"Ollama health check failed: {e}")
         return {"status": "disconnected", "url": OLLAMA_BASE_URL, "error": str(e)}
 
 
 async def list_models() -> list[dict]:
-    """List locally available Ollama models."""
+    """List locally available Ollama models (cached for MODELS_CACHE_TTL seconds)."""
+    cached = _models_cache["v"]
+    if cached is not None and time.monotonic() - _models_cache["t"] < MODELS_CACHE_TTL:
+        return list(cached)
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-            response.raise_for_status()
-            data = response.json()
+        client = get_http_client()
+        response = await client.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=10.0)
+        response.raise_for_status()
+        data = response.json()
         models = []
         for m in data.get("models", []):
             models.append({
@@ -42,20 +59,37 @@ async def list_models() -> list[dict]:
                 "size": m.get("size", 0),
                 "modified_at": m.get("modified_at", ""),
             })
-        return models
+        if models:
+            _models_cache["t"] = time.monotonic()
+            _models_cache["v"] = models
+        return list(models)
     except Exception as e:
         logger.error(f"Failed to list Ollama models: {e}")
         return []
 
 
-async def _make_request_with_retry(client, method, url, **kwargs):
-    """Make HTTP request with retry logic."""
+async def _stream_chat_with_retry(client, url, payload) -> str:
+    """Stream a chat completion with retry logic, returning the joined content."""
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            response = await getattr(client, method)(url, **kwargs)
-            response.raise_for_status()
-            return response
+            async with client.stream("POST", url, json=payload) as response:
+                response.raise_for_status()
+                parts = []
+                done = False
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
+                    parts.append(chunk.get("message", {}).get("content", ""))
+                    if chunk.get("done"):
+                        done = True
+                        break
+                if not done:
+                    raise RuntimeError("Ollama stream ended before the reply was complete")
+                return "".join(parts)
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
                 if attempt == max_retries - 1:
@@ -69,7 +103,11 @@ async def _make_request_with_retry(client, method, url, **kwargs):
 
 
 async def call_ollama(model: str | None, prompt: str) -> str:
-    """Call Ollama for text generation."""
+    """Call Ollama for text generation.
+
+    The reply is streamed so the read timeout applies between chunks rather
+    than to the whole generation; the full text is still returned at once.
+    """
     model = model or DEFAULT_MODEL
     endpoint = f"{OLLAMA_BASE_URL}/api/chat"
 
@@ -79,19 +117,16 @@ async def call_ollama(model: str | None, prompt: str) -> str:
             {"role": "system", "content": SYSTEM_MSG},
             {"role": "user", "content": prompt},
         ],
-        "stream": False,
+        "stream": True,
         "options": {
             "temperature": 0.7,
             "num_predict": 32768,
         },
     }
 
-    async with httpx.AsyncClient(timeout=300.0) as client:
-        logger.info(f"Calling Ollama with model {model}")
-        response = await _make_request_with_retry(client, "post", endpoint, json=payload)
-        data = response.json()
-
-    content = data["message"]["content"]
+    client = get_http_client()
+    logger.info(f"Calling Ollama with model {model}")
+    content = await _stream_chat_with_retry(client, endpoint, payload)
     return content
 
 
@@ -102,79 +137,166 @@ def _unwrap_array(data):
     return data
 
 
-def _is_backslash(ch):
-    """Check if a character is a backslash."""
-    return ch == BACKSLASH
+def _sanitize_escapes(text):
+    """Blank out escape sequences so escaped quotes are not seen as string boundaries.
+
+    Each two-character escape becomes two NULs, so positions stay valid in text.
+    """
+    if '\\' not in text:
+        return text
+    return _RE_ESCAPE.sub('\x00\x00', text)
 
 
-def _find_last_complete_string_pos(text):
-    """Walk through text tracking string boundaries, return position after last closed quote."""
+def _scan_json_structure(sanitized):
+    """Scan escape-free text once for string boundaries and commas.
+
+    Returns (last_closed_quote, last_comma_outside_string, quote_count).
+    """
     last_closed_quote = -1
+    last_comma = -1
+    quote_count = 0
     in_string = False
-    escape_next = False
-
-    for i, ch in enumerate(text):
-        if escape_next:
-            escape_next = False
-            continue
-        if _is_backslash(ch):
-            escape_next = True
-            continue
-        if ch == '"':
+
+    for m in _RE_QUOTE_OR_COMMA.finditer(sanitized):
+        if m.group() == '"':
             if in_string:
-                last_closed_quote = i
+                last_closed_quote = m.start()
             in_string = not in_string
+            quote_count += 1
+        elif not in_string:
+            last_comma = m.start()
 
-    return last_closed_quote
+    return last_closed_quote, last_comma, quote_count
 
 
-def _find_last_comma_outside_string(text):
-    """Find position of last comma that is NOT inside a string."""
-    last_comma = -1
-    in_string = False
-    escape_next = False
-
-    for i, ch in enumerate(text):
-        if escape_next:
-            escape_next = False
-            continue
-        if _is_backslash(ch):
-            escape_next = True
-            continue
-        if ch == '"':
-            in_string = not in_string
-        elif not in_string and ch == ',':
-            last_comma = i
+def _strip_think_blocks(text):
+    """Remove closed <think>...</think> blocks using plain substring search."""
+    parts = []
+    pos = 0
+    while True:
+        start = text.find('<think>', pos)
+        if start < 0:
+            break
+        end = text.find('</think>', start + len('<think>'))
+        if end < 0:
+            break
+        parts.append(text[pos:start])
+        pos = end + len('</think>')
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return ''.join(parts)
 
-    return last_comma
 
+def _find_json_start(text):
+    """Return the index of the first '{' or '[' in text, or -1 if neither is present."""
+    positions = [p for p in (text.find('{'), text.find('[')) if p >= 0]
+    return min(positions) if positions else -1
 
-def _close_brackets(text):
+
+def _bracket_balance(text):
+    """Return (unclosed braces, unclosed brackets) in text."""
+    return text.count('{') - text.count('}'), text.count('[') - text.count(']')
+
+
+def _trim_balance(balance, text, end):
+    """Bracket balance of text[:end], given the balance of the whole text.
+
+    Only the trimmed-off tail is rescanned, which is usually far shorter than the prefix.
+    """
+    ob, obr = _bracket_balance(text[end:])
+    return balance[0] - ob, balance[1] - obr
+
+
+def _close_brackets(text, balance=None):
     """Close any open brackets and braces."""
-    ob = text.count('{') - text.count('}')
-    obr = text.count('[') - text.count(']')
+    ob, obr = balance if balance is not None else _bracket_balance(text)
     return text + ']' * max(0, obr) + '}' * max(0, ob)
 
 
 def _try_parse(text):
     """Try to parse JSON, return dict or None."""
     try:
-        result = json.loads(text)
+        result = orjson.loads(text)
         return _unwrap_array(result)
-    except (json.JSONDecodeError, ValueError):
+    except orjson.JSONDecodeError:
         return None
 
 
+def _is_truncation_error(err):
+    """True if an ijson error means the input ended early rather than being malformed."""
+    msg = str(err)
+    # yajl backends report "premature EOF"; the python backend's EOF errors start with "Incomplete"
+    return "premature EOF" in msg or msg.startswith("Incomplete")
+
+
+def _parse_partial_json(text):
+    """Incrementally parse truncated JSON, keeping only what was complete before the cut.
+
+    Unclosed containers that are array elements (e.g. a half-written week or day)
+    are dropped; unclosed containers under a key keep their completed members.
+    A number running up to the end of input may be cut short, so it is dropped too.
+    Returns None if the input is valid, empty, or broken anywhere other than at its end.
+    """
+    stack = []  # open containers as [container, pending key]
+    last_event = None
+
+    def attach(value):
+        if not stack:
+            return  # a complete top-level value; the error after it is not a truncation
+        if isinstance(stack[-1][0], list):
+            stack[-1][0].append(value)
+        else:
+            stack[-1][0][stack[-1][1]] = value
+
+    try:
+        for event, value in ijson.basic_parse(io.BytesIO(text.encode()), use_float=True):
+            last_event = event
+            if event == 'map_key':
+                stack[-1][1] = value
+            elif event == 'start_map':
+                stack.append([{}, None])
+            elif event == 'start_array':
+                stack.append([[], None])
+            elif event in ('end_map', 'end_array'):
+                attach(stack.pop()[0])
+            else:
+                attach(value)
+    except ijson.JSONError as e:
+        if not _is_truncation_error(e):
+            logger.info(f"Incremental parse hit a syntax error, not a truncation: {e}")
+            return None
+    else:
+        return None
+
+    if not stack:
+        return None
+
+    # A number that runs up to the cut may have lost digits (e.g. 9 of 90)
+    if last_event == 'number' and text.rstrip()[-1:].isdigit():
+        container, key = stack[-1]
+        if isinstance(container, list):
+            container.pop()
+        else:
+            del container[key]
+
+    # Close the containers that were still open at the cut
+    while len(stack) > 1:
+        container, _ = stack.pop()
+        parent, key = stack[-1]
+        if isinstance(parent, list):
+            continue  # half-built array element
+        parent[key] = container
+
+    return _unwrap_array(stack[0][0])
+
+
 def _try_repair_truncated_json(text):
     """Attempt to repair truncated JSON by closing open brackets/braces."""
     logger.info("Attempting JSON repair on truncated response...")
 
     # Find the start of JSON
-    start = -1
-    for i, ch in enumerate(text):
-        if ch in ('{', '['):
-            start = i
-            break
+    start = _find_json_start(text)
 
     if start < 0:
         logger.warning("No JSON start found in response")
@@ -185,44 +307,41 @@ def _try_repair_truncated_json(text):
 
     # === Attempt 0: Close open string (if odd quotes) ===
     # This handles {"key": "val... -> {"key": "val"}
-    quote_count = 0
-    escape_next = False
-    for ch in text:
-        if escape_next:
-            escape_next = False
-            continue
-        if _is_backslash(ch):
-            escape_next = True
-            continue
-        if ch == '"':
-            quote_count += 1
-    
+    last_quote, last_comma, quote_count = _scan_json_structure(_sanitize_escapes(text))
+    balance = _bracket_balance(text)
+
     if quote_count % 2 != 0:
         # Odd number of quotes - try just closing the string
         candidate = text + '"'
-        result = _try_parse(_close_brackets(candidate))
+        result = _try_parse(_close_brackets(candidate, balance))
         if result:
              logger.info(f"Repair attempt 0 succeeded (closed open string)")
              return result
 
+    # Large replies: keep everything parsed before the cut in one pass instead of
+    # the trim-and-reparse attempts below
+    if len(text) >= PARTIAL_PARSE_MIN_LENGTH:
+        result = _parse_partial_json(text)
+        if result and isinstance(result, dict):
+            logger.info("Repair succeeded (incremental parse up to truncation)")
+            return result
+
     # === Attempt 1: Trim to last closed quote, close brackets ===
-    last_quote = _find_last_complete_string_pos(text)
     if last_quote > 0:
         candidate = text[:last_quote + 1]
         # Remove dangling key with no value: , "key":
-        candidate = re.sub(r',\s*"[^"]*"\s*:\s*$', '', candidate)
-        candidate = re.sub(r',\s*$', '', candidate)
-        result = _try_parse(_close_brackets(candidate))
+        candidate = _RE_TRAILING_KEY.sub('', candidate)
+        candidate = _RE_TRAILING_COMMA.sub('', candidate)
+        result = _try_parse(_close_brackets(candidate, _trim_balance(balance, text, len(candidate))))
         if result:
             logger.info(f"Repair attempt 1 succeeded (trimmed to last closed quote)")
             return result
 
     # === Attempt 2: Trim to last comma outside string ===
-    last_comma = _find_last_comma_outside_string(text)
     if last_comma > 0:
         candidate = text[:last_comma]
-        candidate = re.sub(r',\s*$', '', candidate)
-        result = _try_parse(_close_brackets(candidate))
+        candidate = _RE_TRAILING_COMMA.sub('', candidate)
+        result = _try_parse(_close_brackets(candidate, _trim_balance(balance, text, len(candidate))))
         if result:
             logger.info(f"Repair attempt 2 succeeded (trimmed to last comma)")
             return result
@@ -231,8 +350,8 @@ def _try_repair_truncated_json(text):
     last_brace = text.rfind('}')
     if last_brace > 0:
         candidate = text[:last_brace + 1]
-        candidate = re.sub(r',\s*$', '', candidate)
-        result = _try_parse(_close_brackets(candidate))
+        candidate = _RE_TRAILING_COMMA.sub('', candidate)
+        result = _try_parse(_close_brackets(candidate, _trim_balance(balance, text, len(candidate))))
         if result:
             logger.info(f"Repair attempt 3 succeeded (trimmed to last brace)")
             return result
@@ -241,8 +360,8 @@ def _try_repair_truncated_json(text):
     last_bracket = text.rfind(']')
     if last_bracket > 0:
         candidate = text[:last_bracket + 1]
-        candidate = re.sub(r',\s*$', '', candidate)
-        result = _try_parse(_close_brackets(candidate))
+        candidate = _RE_TRAILING_COMMA.sub('', candidate)
+        result = _try_parse(_close_brackets(candidate, _trim_balance(balance, text, len(candidate))))
         if result:
             logger.info(f"Repair attempt 4 succeeded (trimmed to last bracket)")
             return result
@@ -252,13 +371,39 @@ def _try_repair_truncated_json(text):
 
 
 def parse_json_response(text):
+    """Parse JSON from AI response, handling common formatting issues.
+
+    Results are memoized on the raw text, so retried or regenerated replies
+    skip cleanup and repair. A fresh dict is returned on every call.
+    """
+    try:
+        return orjson.loads(_parse_json_cached(text))
+    except TypeError:
+        # orjson cannot serialize ints beyond 64 bits; such results bypass the cache
+        return _parse_json_response(text)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_json_cached(text):
+    """Parse and serialize a response; the bytes are immutable and safe to cache."""
+    return orjson.dumps(_parse_json_response(text))
+
+
+def _parse_json_response(text):
     """Parse JSON from AI response, handling common formatting issues."""
-    text = text.strip()
     logger.info(f"parse_json_response called, input length={len(text)}")
 
+    # Fast path: the model returned clean JSON, skip all preprocessing
+    result = _try_parse(text)
+    if result and isinstance(result, dict):
+        logger.info("Direct parse succeeded")
+        return result
+
+    text = text.strip()
+
     # Remove <think>...</think> blocks (deepseek-r1 models)
     # Handle BOTH closed AND unclosed <think> blocks
-    text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+    text = _strip_think_blocks(text).strip()
     # Handle unclosed <think> (model ran out of tokens during reasoning)
     if '<think>' in text:
         think_pos = text.find('<think>')
@@ -279,11 +424,7 @@ def parse_json_response(text):
         text = "\n".join(lines).strip()
 
     # Strip any text before the first JSON character
-    json_start = -1
-    for i, ch in enumerate(text):
-        if ch in ('{', '['):
-            json_start = i
-            break
+    json_start = _find_json_start(text)
 
     if json_start > 0:
         logger.info(f"Stripping {json_start} chars of preamble before JSON")
@@ -291,10 +432,10 @@ def parse_json_response(text):
     elif json_start < 0:
         raise ValueError(f"No JSON found in AI response: {text[:200]}...")
 
-    # Try direct parse first
+    # Try direct parse on the cleaned text
     result = _try_parse(text)
     if result and isinstance(result, dict):
-        logger.info("Direct parse succeeded")
+        logger.info("Parse succeeded after cleanup")
         return result
 
     # The JSON is likely truncated — try repair
@@ -1,12 +1,15 @@
 """Course generation logic — orchestrates Ollama AI + resource enrichment."""
 
+import asyncio
 import logging
 from ai_providers import call_ollama, parse_json_response
 from resource_search import enrich_with_resources
-from models import CourseRequest, CoursePlan
+from models import CourseRequest, CoursePlan, WeekDetailsRequest, RESOURCE_LIST_ADAPTER
 
 logger = logging.getLogger(__name__)
 
+OLLAMA_CONCURRENCY = 2  # Max simultaneous Ollama generations for batch requests
+
 # ─── Phase 1: Generate compact weekly outline ─────────────────
 OUTLINE_PROMPT_TEMPLATE = """
 Create a structured course outline for:
@@ -94,7 +97,7 @@ RULES:
 
 async def generate_course_outline(request: CourseRequest) -> dict:
     """Generate the weekly course outline (compact, fast)."""
-    prompt = OUTLINE_PROMPT_TEMPLATE.format(goal=request.goal)
+    prompt = OUTLINE_PROMPT_TEMPLATE.format_map({"goal": request.goal})
 
     logger.info(f"Generating weekly outline for: {request.goal}")
     raw = await call_ollama(request.model, prompt)
@@ -106,8 +109,12 @@ async def generate_course_outline(request: CourseRequest) -> dict:
     if "weeks" not in data:
         data["weeks"] = []
 
-    # Ensure each week has defaults
-    for w in data["weeks"]:
+    # Ensure each week has defaults (all_weeks requires a week number and title)
+    for i, w in enumerate(data["weeks"], start=1):
+        if "week" not in w:
+            w["week"] = i
+        if not w.get("title"):
+            w["title"] = f"Week {w['week']}"
         if "concepts" not in w:
             w["concepts"] = []
         if "focus" not in w:
@@ -121,12 +128,12 @@ async def generate_week_details(request) -> dict:
     """Generate daily breakdown for a specific week."""
     concepts_str = ", ".join(request.concepts) if request.concepts else request.week_title
 
-    prompt = WEEK_DETAILS_PROMPT_TEMPLATE.format(
-        goal=request.goal,
-        week_number=request.week_number,
-        week_title=request.week_title,
-        concepts=concepts_str,
-    )
+    prompt = WEEK_DETAILS_PROMPT_TEMPLATE.format_map({
+        "goal": request.goal,
+        "week_number": request.week_number,
+        "week_title": request.week_title,
+        "concepts": concepts_str,
+    })
 
     logger.info(f"Generating details for Week {request.week_number}: {request.week_title}")
     raw = await call_ollama(request.model, prompt)
@@ -144,15 +151,43 @@ async def generate_week_details(request) -> dict:
     return data
 
 
+async def generate_all_weeks(request, sem_size: int = OLLAMA_CONCURRENCY) -> dict:
+    """Generate daily breakdowns for every outline week, a few at a time."""
+    sem = asyncio.Semaphore(sem_size)
+
+    async def one(week):
+        async with sem:
+            return await generate_week_details(WeekDetailsRequest(
+                goal=request.goal,
+                week_number=week.week,
+                week_title=week.title,
+                concepts=week.concepts,
+                model=request.model,
+            ))
+
+    logger.info(f"Generating details for {len(request.weeks)} weeks ({sem_size} at a time)")
+    results = await asyncio.gather(*(one(w) for w in request.weeks), return_exceptions=True)
+
+    weeks = []
+    for week, res in zip(request.weeks, results):
+        if isinstance(res, BaseException):
+            logger.error(f"Week {week.week} generation failed: {res!r}")
+            res = {"days": [], "error": str(res) or type(res).__name__}
+        # The outline's week number wins over any "week" key the model echoed
+        weeks.append({**res, "week": week.week})
+
+    return {"weeks": weeks}
+
+
 async def generate_day_details(request) -> dict:
     """Generate details for a specific day and enrich with resources."""
-    prompt = DAY_DETAILS_PROMPT_TEMPLATE.format(
-        goal=request.goal,
-        day_title=request.day_title,
-        day_number=request.day_number,
-        task_type=request.task_type,
-        duration_minutes=request.duration_minutes,
-    )
+    prompt = DAY_DETAILS_PROMPT_TEMPLATE.format_map({
+        "goal": request.goal,
+        "day_title": request.day_title,
+        "day_number": request.day_number,
+        "task_type": request.task_type,
+        "duration_minutes": request.duration_minutes,
+    })
 
     logger.info(f"Generating details for Day {request.day_number}: {request.day_title}")
     raw = await call_ollama(request.model, prompt)
@@ -162,16 +197,24 @@ async def generate_day_details(request) -> dict:
     if "resources" in data:
         from resource_search import search_youtube, search_web
 
-        final_resources = []
+        tasks = []
         for r in data["resources"][:4]:
             q = r.get("title", request.day_title)
             if r.get("source") == "youtube":
-                res = await search_youtube(q + " tutorial")
-                if res: final_resources.append(res[0])
+                tasks.append(search_youtube(q + " tutorial"))
             else:
-                res = await search_web(q + " tutorial")
-                if res: final_resources.append(res[0])
+                tasks.append(search_web(q + " tutorial"))
+
+        # Run all searches concurrently instead of one after another
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        final_resources = []
+        for res in results:
+            if isinstance(res, Exception):
+                logger.warning(f"Resource search failed: {res}")
+                continue
+            if res: final_resources.append(res[0])
 
-        data["resources"] = [r.model_dump() for r in final_resources]
+        data["resources"] = RESOURCE_LIST_ADAPTER.dump_python(final_resources)
 
     return data
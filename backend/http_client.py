@@ -0,0 +1,20 @@
+"""Shared HTTP client for outbound requests (Ollama, Invidious)."""
+
+import httpx
+
+# Shared HTTP client, created in the FastAPI lifespan hook (see main.py)
+_http_client: httpx.AsyncClient | None = None
+
+
+def set_http_client(client: httpx.AsyncClient | None) -> None:
+    """Register the shared HTTP client used for all outbound requests."""
+    global _http_client
+    _http_client = client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating one if none was registered."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=300.0)
+    return _http_client
@@ -1,13 +1,22 @@
 """FastAPI application — AI Course Generator backend (Ollama-powered)."""
 
 import logging
+from contextlib import asynccontextmanager
+
+import httpx
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from models import CourseRequest, WeekDetailsRequest, DayDetailsRequest
-from course_generator import generate_course_outline, generate_week_details, generate_day_details
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from models import CourseRequest, WeekDetailsRequest, AllWeeksRequest, DayDetailsRequest
+from course_generator import (
+    generate_course_outline,
+    generate_week_details,
+    generate_all_weeks,
+    generate_day_details,
+)
 from ai_providers import check_ollama_health, list_models
+from http_client import set_http_client
 
 # Configure logging
 logging.basicConfig(
@@ -16,10 +25,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP client (keep-alive) across all requests."""
+    client = httpx.AsyncClient(
+        timeout=300.0,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=30.0,
+        ),
+    )
+    set_http_client(client)
+    try:
+        yield
+    finally:
+        set_http_client(None)
+        await client.aclose()
+
+
 app = FastAPI(
     title="AI Course Generator",
     description="Generate personalized learning courses with Ollama AI",
     version="4.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS — allow frontend dev server
@@ -94,6 +125,18 @@ async def generate_week(request: WeekDetailsRequest):
         raise HTTPException(status_code=500, detail=f"Week generation failed: {str(e)}")
 
 
+@app.post("/api/generate/all_weeks")
+async def generate_weeks(request: AllWeeksRequest):
+    """Generate daily breakdowns for every week of an outline concurrently."""
+    try:
+        logger.info(f"Generating details for all {len(request.weeks)} weeks")
+        details = await generate_all_weeks(request)
+        return details
+    except Exception as e:
+        logger.error(f"All-weeks generation failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"All-weeks generation failed: {str(e)}")
+
+
 @app.post("/api/generate/day")
 async def generate_day(request: DayDetailsRequest):
     """Generate details for a specific day."""
@@ -106,5 +149,14 @@ async def generate_day(request: DayDetailsRequest):
 
 
 if __name__ == "__main__":
+    import os
+    import sys
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows support
+        http="httptools",
+        reload=os.getenv("RELOAD") == "1",
+    )
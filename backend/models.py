@@ -1,6 +1,6 @@
 """Pydantic models for the AI Course Generator."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional
 
 
@@ -19,6 +19,21 @@ class WeekDetailsRequest(BaseModel):
     model: Optional[str] = None
 
 
+class OutlineWeek(BaseModel):
+    """A single week from a generated course outline."""
+    week: int
+    title: str
+    concepts: list[str] = []
+    focus: str = "theory"
+
+
+class AllWeeksRequest(BaseModel):
+    """Request to generate daily breakdowns for every week of an outline."""
+    goal: str
+    weeks: list[OutlineWeek]
+    model: Optional[str] = None
+
+
 class DayDetailsRequest(BaseModel):
     """Request to generate details for a specific day."""
     goal: str
@@ -31,6 +46,8 @@ class DayDetailsRequest(BaseModel):
 
 class Resource(BaseModel):
     """A learning resource (YouTube video or web article)."""
+    model_config = ConfigDict(frozen=True)
+
     title: str
     url: str
     source: str  # "youtube" or "web"
@@ -38,6 +55,10 @@ class Resource(BaseModel):
     description: Optional[str] = None
 
 
+# Dumps a whole list of resources in one call instead of model_dump() per item
+RESOURCE_LIST_ADAPTER = TypeAdapter(list[Resource])
+
+
 class TopicClass(BaseModel):
     """A class/lesson covering a specific topic."""
     topic: str
@@ -1,9 +1,12 @@
 """Resource search: YouTube videos via Invidious and web articles via DuckDuckGo."""
 
-import httpx
+import asyncio
 import logging
+import random
+import time
 from duckduckgo_search import DDGS
-from models import Resource
+from models import Resource, RESOURCE_LIST_ADAPTER
+from http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,49 +17,117 @@ INVIDIOUS_INSTANCES = [
     "https://invidious.privacyredirect.com",
     "https://inv.nadeko.net",
 ]
+INVIDIOUS_TIMEOUT = 5.0
+LATENCY_EWMA_ALPHA = 0.3
+SUCCESS_EWMA_ALPHA = 0.5
 
+# Per-instance health: [success rate EWMA in 0..1, EWMA latency in seconds]
+_instance_stats = {instance: [1.0, 0.0] for instance in INVIDIOUS_INSTANCES}
 
-async def search_youtube(query: str, max_results: int = 3) -> list[Resource]:
-    """Search YouTube videos via Invidious public API."""
-    resources = []
 
-    for instance in INVIDIOUS_INSTANCES:
-        try:
-            url = f"{instance}/api/v1/search"
-            params = {
-                "q": query,
-                "type": "video",
-                "sort_by": "relevance",
-            }
-
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-            for item in data[:max_results]:
-                video_id = item.get("videoId", "")
-                resources.append(
-                    Resource(
-                        title=item.get("title", "Untitled"),
-                        url=f"https://www.youtube.com/watch?v={video_id}",
-                        source="youtube",
-                        thumbnail=f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg",
-                        description=item.get("description", "")[:200] if item.get("description") else None,
-                    )
+def _ranked_instances() -> list[str]:
+    """Order Invidious instances best-first by success score over latency; ties are shuffled.
+
+    search_youtube races every instance, so this order only decides which answer
+    wins when several finish in the same asyncio.wait batch.
+    """
+    instances = list(INVIDIOUS_INSTANCES)
+    random.shuffle(instances)
+
+    def score(instance):
+        success, latency = _instance_stats.setdefault(instance, [1.0, 0.0])
+        return -success / (latency + 1.0)
+
+    return sorted(instances, key=score)
+
+
+def _record_success(instance: str, latency: float) -> None:
+    """Credit an instance and fold the request latency into its EWMA."""
+    stats = _instance_stats.setdefault(instance, [1.0, 0.0])
+    stats[0] = SUCCESS_EWMA_ALPHA + (1 - SUCCESS_EWMA_ALPHA) * stats[0]
+    stats[1] = latency if stats[1] == 0.0 else (
+        LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * stats[1]
+    )
+
+
+def _record_failure(instance: str) -> None:
+    """Decay an instance's success score so it drops down the ranking."""
+    stats = _instance_stats.setdefault(instance, [1.0, 0.0])
+    stats[0] *= 1 - SUCCESS_EWMA_ALPHA
+
+
+async def _probe_instance(instance: str, query: str, max_results: int) -> list[Resource]:
+    """Search a single Invidious instance, recording its health."""
+    url = f"{instance}/api/v1/search"
+    params = {
+        "q": query,
+        "type": "video",
+        "sort_by": "relevance",
+    }
+
+    client = get_http_client()
+    started = time.monotonic()
+    try:
+        response = await client.get(url, params=params, timeout=INVIDIOUS_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        latency = time.monotonic() - started
+
+        resources = []
+        for item in data[:max_results]:
+            video_id = item.get("videoId", "")
+            resources.append(
+                Resource(
+                    title=item.get("title", "Untitled"),
+                    url=f"https://www.youtube.com/watch?v={video_id}",
+                    source="youtube",
+                    thumbnail=f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg",
+                    description=item.get("description", "")[:200] if item.get("description") else None,
                 )
+            )
+    except Exception:
+        _record_failure(instance)
+        raise
+
+    # Only credit the instance for usable results; an empty answer is neutral
+    if resources:
+        _record_success(instance, latency)
+    return resources
 
-            if resources:
-                logger.info(f"Found {len(resources)} YouTube videos for '{query}' via {instance}")
-                return resources
 
-        except Exception as e:
-            logger.warning(f"Invidious instance {instance} failed: {e}")
-            continue
+async def search_youtube(query: str, max_results: int = 3) -> list[Resource]:
+    """Search YouTube videos via Invidious public API.
+
+    All instances are queried concurrently; the first non-empty answer wins
+    and the remaining requests are cancelled.
+    """
+    instances = _ranked_instances()
+    tasks = {
+        asyncio.create_task(_probe_instance(instance, query, max_results)): instance
+        for instance in instances
+    }
+    pending = set(tasks)
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the best-ranked instance when several finish together
+            for task in sorted(done, key=lambda t: instances.index(tasks[t])):
+                instance = tasks[task]
+                if task.exception() is not None:
+                    logger.warning(f"Invidious instance {instance} failed: {task.exception()}")
+                    continue
+                resources = task.result()
+                if resources:
+                    logger.info(f"Found {len(resources)} YouTube videos for '{query}' via {instance}")
+                    return resources
+    finally:
+        for task in pending:
+            task.cancel()
 
     # Fallback: return constructed YouTube search link
     logger.warning(f"All Invidious instances failed for '{query}', returning search link")
-    resources.append(
+    return [
         Resource(
             title=f"Search YouTube: {query}",
             url=f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}",
@@ -64,8 +135,13 @@ async def search_youtube(query: str, max_results: int = 3) -> list[Resource]:
             thumbnail=None,
             description=f"Search YouTube for: {query}",
         )
-    )
-    return resources
+    ]
+
+
+def _ddgs_text(query: str, max_results: int) -> list[dict]:
+    """Blocking DuckDuckGo text search; run it in a worker thread."""
+    with DDGS() as ddgs:
+        return list(ddgs.text(f"{query} tutorial guide", max_results=max_results))
 
 
 async def search_web(query: str, max_results: int = 3) -> list[Resource]:
@@ -73,8 +149,9 @@ async def search_web(query: str, max_results: int = 3) -> list[Resource]:
     resources = []
 
     try:
-        with DDGS() as ddgs:
-            results = list(ddgs.text(f"{query} tutorial guide", max_results=max_results))
+        # DDGS is synchronous, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, _ddgs_text, query, max_results)
 
         for item in results:
             resources.append(
@@ -104,33 +181,41 @@ async def search_web(query: str, max_results: int = 3) -> list[Resource]:
     return resources
 
 
+async def _search_query(query: str) -> tuple[list[Resource], list[Resource]]:
+    """Run the YouTube and web searches for one query concurrently."""
+    yt_results, web_results = await asyncio.gather(search_youtube(query), search_web(query))
+    return yt_results, web_results
+
+
+async def _enrich_class(cls: dict) -> None:
+    """Attach deduplicated resources to a single topic class."""
+    search_queries = cls.get("search_queries", [])
+    if not search_queries:
+        search_queries = [cls.get("topic", "")]
+
+    all_youtube = []
+    all_web = []
+
+    # Limit to 2 queries per topic, searched concurrently
+    results = await asyncio.gather(*(_search_query(q) for q in search_queries[:2]))
+    for yt_results, web_results in results:
+        all_youtube.extend(yt_results)
+        all_web.extend(web_results)
+
+    # Deduplicate by URL (first occurrence wins), then dump only the kept items
+    dedup = {}
+    for r in all_youtube + all_web:
+        url = r.url if isinstance(r, Resource) else r.get("url", "")
+        dedup.setdefault(url, r)
+
+    kept = list(dedup.values())
+    if all(isinstance(r, Resource) for r in kept):
+        cls["resources"] = RESOURCE_LIST_ADAPTER.dump_python(kept)
+    else:
+        cls["resources"] = [r.model_dump() if isinstance(r, Resource) else r for r in kept]
+
+
 async def enrich_with_resources(classes: list[dict]) -> list[dict]:
     """Enrich topic classes with YouTube and web resources."""
-    for cls in classes:
-        search_queries = cls.get("search_queries", [])
-        if not search_queries:
-            search_queries = [cls.get("topic", "")]
-
-        all_youtube = []
-        all_web = []
-
-        for query in search_queries[:2]:  # Limit to 2 queries per topic
-            yt_results = await search_youtube(query)
-            web_results = await search_web(query)
-            all_youtube.extend(yt_results)
-            all_web.extend(web_results)
-
-        # Deduplicate by URL
-        seen_urls = set()
-        unique_resources = []
-        for r in all_youtube + all_web:
-            if isinstance(r, Resource):
-                r = r.model_dump()
-            url = r.get("url", "")
-            if url not in seen_urls:
-                seen_urls.add(url)
-                unique_resources.append(r)
-
-        cls["resources"] = unique_resources
-
+    await asyncio.gather(*(_enrich_class(cls) for cls in classes))
     return classes
@@ -129,3 +129,64 @@ for i, tc in enumerate(test_cases):
     else:
         print(f"  FAILED - no parse")
     print()
+
+
+# ─── Large replies (incremental ijson parse in ai_providers) ──
+from ai_providers import PARTIAL_PARSE_MIN_LENGTH, parse_json_response
+
+weeks = [
+    {"week": n, "title": f"Week {n} Topic", "concepts": ["Concept A", "Concept B", "Concept C"], "focus": "theory"}
+    for n in range(1, 61)
+]
+big_outline = json.dumps({"title": "Big Course", "description": "Long outline", "weeks": weeks}, indent=2)
+assert len(big_outline) > PARTIAL_PARSE_MIN_LENGTH
+
+print("=" * 60)
+
+# Truncated mid-week: every complete week survives
+truncated = big_outline[:big_outline.index('"week": 60') + 30]
+result = parse_json_response(truncated)
+assert result["title"] == "Big Course"
+assert len(result["weeks"]) == 59, result["weeks"][-2:]
+assert [w["week"] for w in result["weeks"]] == list(range(1, 60))
+assert all(w.get("title") for w in result["weeks"])
+print(f"Large truncated outline: recovered {len(result['weeks'])} weeks")
+
+# Truncated inside a number: no cut-off value (6 of 60, 9 of 90) is returned
+truncated = big_outline[:big_outline.index('"week": 60') + len('"week": 6')]
+result = parse_json_response(truncated)
+assert [w["week"] for w in result["weeks"]] == list(range(1, 60)), result["weeks"][-2:]
+print("Large outline cut inside a week number: incomplete week dropped")
+
+days = [
+    {"day": n, "title": f"Day {n}", "task_type": "practice", "duration_minutes": 90, "concepts": ["A", "B"]}
+    for n in range(1, 201)
+]
+big_week = json.dumps({"days": days}, indent=2)
+truncated = big_week[:big_week.rindex('"duration_minutes": 90') + len('"duration_minutes": 9')]
+result = parse_json_response(truncated)
+assert len(result["days"]) == 199
+assert all(d["duration_minutes"] == 90 and d.get("title") for d in result["days"])
+print("Large week cut inside a duration: incomplete day dropped")
+
+tail_number = json.dumps({"title": "Big Course", "weeks": weeks, "duration_weeks": 60}, indent=2)
+result = parse_json_response(tail_number[:tail_number.rindex("60")] + "6")
+assert "duration_weeks" not in result and len(result["weeks"]) == 60
+print("Large outline cut inside a top-level number: value dropped")
+
+# Truncated inside a string: the open string is closed (attempt 0), not dropped
+tail_string = json.dumps({"title": "Big Course", "weeks": weeks, "summary": "Sixty weeks of practice"}, indent=2)
+result = parse_json_response(tail_string[:tail_string.index("actice")])
+assert result["summary"] == "Sixty weeks of pr", result.get("summary")
+assert len(result["weeks"]) == 60
+print("Large outline cut inside a string: open string closed")
+
+# A syntax error mid-document is not a truncation and must not yield a partial course
+broken = big_outline.replace('"Concept C"', '"Concept C",', 1)
+assert broken != big_outline
+try:
+    result = parse_json_response(broken)
+except ValueError:
+    print("Large outline with stray comma: rejected")
+else:
+    raise AssertionError(f"stray comma accepted, got {len(result.get('weeks', []))} weeks")